@@ -1,15 +1,23 @@
-from tinydb import Query
-from db.tinydb_client import db_client
+from db.tinydb_client import db_client, index_by_ip
 from datetime import datetime
 from utils.logging_config import get_logger
-from db.device_repository import get_mac_from_ip
+from db.device_repository import get_device_by_ip, get_devices_by_ip
 
 # Setup logging
 logger = get_logger('db.blacklist')
 
 # Use the initialized tables from db_client
 blacklist_table = db_client.bandwidth_blacklist
-Device = Query()
+
+# IP -> doc_id index over the blacklist table, built lazily on first use and kept
+# in step with add/remove/clear so lookups by IP don't scan the table.
+_ip_index = None
+
+def _get_ip_index():
+    global _ip_index
+    if _ip_index is None:
+        _ip_index = index_by_ip(blacklist_table)
+    return _ip_index
 
 def get_blacklist():
     """
@@ -19,13 +27,25 @@ def get_blacklist():
         list: List of blacklisted device entries
     """
     try:
-        db_client.flush()  # Ensure we have the latest data before reading
         entries = blacklist_table.all()
         return entries
     except Exception as e:
         logger.error(f"Error retrieving blacklist: {str(e)}", exc_info=True)
         return []
 
+def get_blacklist_ips():
+    """
+    Retrieves just the IP addresses of the blacklisted devices
+    
+    Returns:
+        list: IP addresses in the blacklist
+    """
+    try:
+        return [entry['ip'] for entry in blacklist_table.all()]
+    except Exception as e:
+        logger.error(f"Error retrieving blacklist IPs: {str(e)}", exc_info=True)
+        return []
+
 def add_to_blacklist(ip, name=None):
     """
     Adds a device to the blacklist
@@ -38,39 +58,84 @@ def add_to_blacklist(ip, name=None):
         dict: The added device entry
     """
     try:
-        mac = get_mac_from_ip(ip)
+        device = get_device_by_ip(ip)
+        mac = device.get('mac') if device else None
         if not mac:
             raise ValueError(f"Device with IP {ip} not found in network")
             
-        # Check if device already exists in blacklist
-        existing = blacklist_table.get(Device.ip == ip)
-        if existing:
-            # Update existing entry
-            entry = {
-                "ip": ip,
-                "mac": mac,
-                "name": name or existing.get("name", f"Device-{ip}"),
-                "added_at": datetime.now().isoformat()
-            }
-            blacklist_table.update(entry, Device.ip == ip)
+        entry = {
+            "ip": ip,
+            "mac": mac,
+            "hostname": device.get("hostname", "Unknown"),
+            "added_at": datetime.now().isoformat(timespec='seconds')
+        }
+        if name:
+            entry["name"] = name
+            
+        # Update the existing entry in place (keeping its name unless a new one is given)
+        doc_id = _get_ip_index().get(ip)
+        if doc_id is not None:
+            blacklist_table.update(entry, doc_ids=[doc_id])
+            entry = dict(blacklist_table.get(doc_id=doc_id))
             logger.info(f"Updated blacklist entry for device {ip}")
         else:
-            # Add new entry
-            entry = {
-                "ip": ip,
-                "mac": mac,
-                "name": name or f"Device-{ip}",
-                "added_at": datetime.now().isoformat()
-            }
-            blacklist_table.insert(entry)
+            entry.setdefault("name", f"Device-{ip}")
+            _get_ip_index()[ip] = blacklist_table.insert(entry)
             logger.info(f"Added device {ip} to blacklist")
             
-        db_client.flush()  # Ensure changes are persisted
+        db_client.schedule_flush()
         return entry
     except Exception as e:
         logger.error(f"Error adding device to blacklist: {str(e)}", exc_info=True)
         raise
 
+def bulk_add_to_blacklist(ips):
+    """
+    Adds several devices to the blacklist database with a single insert
+    
+    IPs that are already blacklisted or not in the devices table are skipped.
+    
+    Args:
+        ips (list): IP addresses of the devices
+        
+    Returns:
+        tuple: (list of entries that were added, list of IPs that were skipped)
+    """
+    try:
+        index = _get_ip_index()
+        devices_by_ip = get_devices_by_ip()
+        added_at = datetime.now().isoformat(timespec='seconds')
+        
+        entries = []
+        skipped = []
+        seen = set()
+        for ip in ips:
+            device = devices_by_ip.get(ip)
+            if ip in index or ip in seen or not device or not device.get('mac'):
+                skipped.append(ip)
+                continue
+            seen.add(ip)
+            entries.append({
+                "ip": ip,
+                "mac": device['mac'],
+                "hostname": device.get("hostname", "Unknown"),
+                "added_at": added_at,
+                "name": f"Device-{ip}"
+            })
+        
+        if entries:
+            doc_ids = blacklist_table.insert_multiple(entries)
+            index.update((entry['ip'], doc_id) for entry, doc_id in zip(entries, doc_ids))
+            db_client.schedule_flush()
+        
+        if skipped:
+            logger.warning(f"Skipped {len(skipped)} IPs already in blacklist or not in devices table: {skipped}")
+        logger.info(f"Added {len(entries)} devices to blacklist")
+        return entries, skipped
+    except Exception as e:
+        logger.error(f"Error bulk adding to blacklist: {str(e)}", exc_info=True)
+        raise
+
 def remove_from_blacklist(ip):
     """
     Removes a device from the blacklist
@@ -82,11 +147,13 @@ def remove_from_blacklist(ip):
         bool: True if device was removed, False otherwise
     """
     try:
-        removed = blacklist_table.remove(Device.ip == ip)
-        db_client.flush()  # Ensure changes are persisted
-        if removed:
-            logger.info(f"Removed device {ip} from blacklist")
-        return bool(removed)
+        doc_id = _get_ip_index().pop(ip, None)
+        if doc_id is None:
+            return False
+        blacklist_table.remove(doc_ids=[doc_id])
+        db_client.schedule_flush()
+        logger.info(f"Removed device {ip} from blacklist")
+        return True
     except Exception as e:
         logger.error(f"Error removing device from blacklist: {str(e)}", exc_info=True)
         raise
@@ -101,10 +168,15 @@ def clear_blacklist():
     Raises:
         Exception: If there was an error clearing the blacklist
     """
+    global _ip_index
     try:
+        if len(blacklist_table) == 0:
+            # Nothing to clear - don't rewrite the database file
+            return True
         logger.info("Clearing all entries from blacklist")
         blacklist_table.truncate()
-        db_client.flush()  # Ensure the clearing is persisted
+        _ip_index = {}
+        db_client.schedule_flush()
         logger.info("Successfully cleared blacklist")
         return True
     except Exception as e:
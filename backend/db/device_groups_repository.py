@@ -1,8 +1,7 @@
-import logging
+from utils.logging_config import get_logger
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+# Setup logging
+logger = get_logger('db.device_groups')
 
 # TinyDB Query objects
 # Group = Query() # Removed
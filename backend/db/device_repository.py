@@ -1,14 +1,78 @@
 from tinydb import Query
-from db.tinydb_client import db_client
+from db.tinydb_client import db_client, index_by_ip
 from datetime import datetime
 import logging
+import threading
+from utils.logging_config import get_logger
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+# Setup logging
+logger = get_logger('db.devices')
 
 # TinyDB Query object
 Device = Query()
+# Field path bound once instead of resolved through Query.__getattr__ on every call
+_DEVICE_MAC = Device.mac
+
+# MAC -> [doc_id, ...] index over the devices table. Built lazily on first lookup
+# and reset whenever rows are inserted or removed (updates never change a MAC).
+# Older databases may hold several records per MAC; the first one is the one
+# lookups return, and writes apply to all of them. Keys are lowercased so the
+# same device matches whether a scanner reported its MAC in upper or lower case.
+_mac_index = None
+
+# Guards building and dropping the device indexes. A rebuild scans the table while
+# holding it, and writers drop the indexes under it only after their write, so an
+# index built from the table as it was before a write can't be installed after it.
+_index_lock = threading.RLock()
+
+def normalize_mac(mac):
+    """Return the lookup key for a MAC address (lowercased), as used by the MAC index and get_devices_by_mac."""
+    return mac.lower() if isinstance(mac, str) else mac
+
+def _get_mac_index():
+    """Return the MAC -> doc_ids index, building it from one table scan if needed."""
+    global _mac_index
+    index = _mac_index
+    if index is None:
+        with _index_lock:
+            if _mac_index is None:
+                built = {}
+                for device in db_client.devices.all():
+                    built.setdefault(normalize_mac(device.get('mac')), []).append(device.doc_id)
+                _mac_index = built
+            index = _mac_index
+    return index
+
+def _find_doc_ids(mac):
+    """Return the doc_ids of the records for a MAC address, or None if there are none."""
+    return _get_mac_index().get(normalize_mac(mac))
+
+# IP -> doc_id index, keeping the first record per IP like a Query-based get().
+# Unlike MACs, IPs change on update, so this is also reset when an IP is rewritten.
+_ip_index = None
+
+def _get_ip_index():
+    global _ip_index
+    index = _ip_index
+    if index is None:
+        with _index_lock:
+            if _ip_index is None:
+                _ip_index = index_by_ip(db_client.devices)
+            index = _ip_index
+    return index
+
+def _invalidate_ip_index():
+    """Drop the IP index after device IPs have changed. Call after the write."""
+    global _ip_index
+    with _index_lock:
+        _ip_index = None
+
+def _invalidate_indexes():
+    """Drop the device indexes so the next lookup rebuilds them. Call after the write."""
+    global _mac_index
+    with _index_lock:
+        _mac_index = None
+        _invalidate_ip_index()
 
 # This function is no longer needed with TinyDB but kept as a no-op for compatibility
 def init_db():
@@ -26,7 +90,8 @@ def get_mac_from_ip(ip):
         str: The MAC address if found, None otherwise
     """
     try:
-        device = db_client.devices.get(Device.ip == ip)
+        doc_id = _get_ip_index().get(ip)
+        device = db_client.devices.get(doc_id=doc_id) if doc_id is not None else None
         if device:
             return device.get('mac')
         return None
@@ -37,12 +102,13 @@ def get_mac_from_ip(ip):
 def register_device(ip, mac, hostname="Unknown"):
     """Register a new device or update an existing one based on MAC address."""
     try:
-        Device = Query()
-        existing_device_by_mac = db_client.devices.get(Device.mac == mac)
+        doc_ids = _find_doc_ids(mac)
+        existing_device_by_mac = db_client.devices.get(doc_id=doc_ids[0]) if doc_ids else None
+        now = datetime.now().isoformat()
 
         if existing_device_by_mac:
             # Device with this MAC already exists.
-            updates = {'last_seen': datetime.now().isoformat()}
+            updates = {'last_seen': now}
             
             # Check if IP address has changed or was not set before
             if existing_device_by_mac.get('ip') != ip:
@@ -51,7 +117,12 @@ def register_device(ip, mac, hostname="Unknown"):
                 updates['hostname'] = hostname 
             # Else (IP is the same), hostname is NOT updated, preserving any existing name.
             
-            db_client.devices.update(updates, Device.mac == mac)
+            db_client.devices.update(updates, doc_ids=doc_ids)
+            if 'ip' in updates:
+                _invalidate_ip_index()
+            if 'hostname' in updates:
+                # List entries copy the stored MAC, which may differ in case from the scanned one
+                _sync_list_hostnames({existing_device_by_mac['mac']: hostname})
             logger.info(f"Updated existing device (MAC: {mac}) - IP: {ip}, Hostname: {existing_device_by_mac.get('hostname') if updates.get('hostname') is None else updates.get('hostname')}")
         else:
             # No device with this MAC exists - it's a new device.
@@ -60,15 +131,112 @@ def register_device(ip, mac, hostname="Unknown"):
                 'ip': ip,
                 'mac': mac,
                 'hostname': hostname,
-                'first_seen': datetime.now().isoformat(), # Add first_seen for new devices
-                'last_seen': datetime.now().isoformat()
+                'first_seen': now, # Add first_seen for new devices
+                'last_seen': now
             })
+            _invalidate_indexes()
+        db_client.schedule_flush()
         
         return True
     except Exception as e:
         logger.error(f"Error registering device {ip} (MAC: {mac}): {str(e)}", exc_info=True)
         return False
 
+def register_devices(devices):
+    """
+    Register or update a batch of devices, e.g. the result of a network scan.
+
+    Existing records are read once and all changes are written back in a single
+    update and a single insert_multiple, instead of one table write per device.
+
+    Args:
+        devices (list): Device dictionaries with 'ip', 'mac' and optional 'hostname' keys
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        existing_by_mac = {}
+        # doc_ids come from this same scan rather than the MAC index, which another
+        # thread's insert may not have refreshed yet
+        doc_ids_by_mac = {}
+        for existing in db_client.devices.all():
+            key = normalize_mac(existing.get('mac'))
+            existing_by_mac.setdefault(key, existing)
+            doc_ids_by_mac.setdefault(key, []).append(existing.doc_id)
+
+        changes_by_mac = {}
+        new_devices = {}
+        # One timestamp for the whole scan
+        now = datetime.now().isoformat()
+        # Per-device details only at DEBUG; a scan logs a single summary line
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        for device in devices:
+            ip = device['ip']
+            mac = device['mac']
+            key = normalize_mac(mac)
+            hostname = device.get('hostname', "Unknown")
+
+            if key in new_devices:
+                # Seen earlier in this batch - same rules as an existing device.
+                if new_devices[key]['ip'] != ip:
+                    new_devices[key].update({'ip': ip, 'hostname': hostname})
+                new_devices[key]['last_seen'] = now
+            elif key in existing_by_mac:
+                updates = changes_by_mac.setdefault(key, {})
+                updates['last_seen'] = now
+                current_ip = updates.get('ip', existing_by_mac[key].get('ip'))
+                if current_ip != ip:
+                    updates['ip'] = ip
+                    updates['hostname'] = hostname
+                if debug_enabled:
+                    logger.debug("Updated existing device (MAC: %s) - IP: %s, Hostname: %s", mac, ip, updates.get('hostname', existing_by_mac[key].get('hostname')))
+            else:
+                if debug_enabled:
+                    logger.debug("Registering new device (MAC: %s) - IP: %s, Hostname: %s", mac, ip, hostname)
+                new_devices[key] = {
+                    'ip': ip,
+                    'mac': mac,
+                    'hostname': hostname,
+                    'first_seen': now,
+                    'last_seen': now
+                }
+
+        if changes_by_mac:
+            doc_ids = [doc_id for key in changes_by_mac for doc_id in doc_ids_by_mac[key]]
+            db_client.devices.update(
+                lambda doc: doc.update(changes_by_mac[normalize_mac(doc['mac'])]),
+                doc_ids=doc_ids
+            )
+            if any('ip' in updates for updates in changes_by_mac.values()):
+                _invalidate_ip_index()
+            renamed = {existing_by_mac[key]['mac']: updates['hostname'] for key, updates in changes_by_mac.items() if 'hostname' in updates}
+            if renamed:
+                _sync_list_hostnames(renamed)
+        if new_devices:
+            db_client.devices.insert_multiple(list(new_devices.values()))
+            _invalidate_indexes()
+        db_client.schedule_flush()
+
+        logger.info(f"Registered {len(devices)} scanned devices: {len(new_devices)} new, {len(changes_by_mac)} updated")
+        return True
+    except Exception as e:
+        logger.error(f"Error registering {len(devices)} devices: {str(e)}", exc_info=True)
+        return False
+
+def _sync_list_hostnames(hostnames_by_mac):
+    """
+    Keep the hostname copied onto whitelist/blacklist entries in sync with the devices table.
+    
+    Args:
+        hostnames_by_mac (dict): Mapping of MAC address to its new hostname
+    """
+    for table in (db_client.bandwidth_whitelist, db_client.bandwidth_blacklist):
+        table.update(
+            lambda entry: entry.update({'hostname': hostnames_by_mac[entry['mac']]}),
+            _DEVICE_MAC.one_of(set(hostnames_by_mac))
+        )
+
 def delete_device(mac, ip):
     """
     Delete a device and all its related data.
@@ -82,8 +250,14 @@ def delete_device(mac, ip):
     """
     try:
         # Delete device
-        db_client.devices.remove(Device.mac == mac)
-        db_client.flush()  # Ensure changes are persisted
+        doc_ids = _find_doc_ids(mac)
+        if doc_ids:
+            stored_mac = db_client.devices.get(doc_id=doc_ids[0])['mac']
+            db_client.devices.remove(doc_ids=doc_ids)
+            _invalidate_indexes()
+            # List entries for the device no longer have a device to name them
+            _sync_list_hostnames({stored_mac: "Unknown"})
+        db_client.schedule_flush()
         
         logger.info(f"Deleted device {mac} and all related data")
         return True
@@ -100,12 +274,38 @@ def get_all_devices():
     """
     try:
         devices = db_client.devices.all()
-        db_client.flush()  # Ensure we have the latest data
         return devices
     except Exception as e:
         logger.error(f"Error getting devices: {e}")
         return []
 
+def get_devices_by_mac():
+    """
+    Get all devices keyed by MAC address, for callers that need many lookups.
+    Keeps the first record if a MAC appears more than once, like get_device_by_mac.
+    Keys are normalized, so look MACs up with normalize_mac(mac).
+    
+    Returns:
+        dict: Mapping of normalized MAC address to device dictionary
+    """
+    devices_by_mac = {}
+    for device in get_all_devices():
+        devices_by_mac.setdefault(normalize_mac(device.get('mac')), device)
+    return devices_by_mac
+
+def get_devices_by_ip():
+    """
+    Get all devices keyed by IP address, for callers that need many lookups.
+    Keeps the first record if an IP appears more than once, like get_device_by_ip.
+    
+    Returns:
+        dict: Mapping of IP address to device dictionary
+    """
+    devices_by_ip = {}
+    for device in get_all_devices():
+        devices_by_ip.setdefault(device.get('ip'), device)
+    return devices_by_ip
+
 def update_device_name(mac, ip, device_name):
     """
     Update a device's name by MAC address.
@@ -119,11 +319,12 @@ def update_device_name(mac, ip, device_name):
         bool: True if successful, False otherwise
     """
     try:
+        doc_ids = _find_doc_ids(mac)
         result = db_client.devices.update(
             {'device_name': device_name}, 
-            Device.mac == mac
-        )
-        db_client.flush()  # Ensure changes are persisted
+            doc_ids=doc_ids
+        ) if doc_ids else []
+        db_client.schedule_flush()
         logger.info(f"Updated device name for {mac} to {device_name}")
         return len(result) > 0
     except Exception as e:
@@ -140,7 +341,8 @@ def clear_devices():
     try:
         # Then clear devices
         db_client.devices.truncate()
-        db_client.flush()  # Ensure changes are persisted
+        _invalidate_indexes()
+        db_client.schedule_flush()
         
         logger.info("Cleared all devices and related data")
         return True
@@ -160,8 +362,8 @@ def get_device_by_mac(mac):
         dict: The device record if found, None otherwise
     """
     try:
-        device = db_client.devices.get(Device.mac == mac)
-        db_client.flush()  # Ensure we have the latest data
+        doc_ids = _find_doc_ids(mac)
+        device = db_client.devices.get(doc_id=doc_ids[0]) if doc_ids else None
         return device
     except Exception as e:
         logger.error(f"Error getting device by MAC {mac}: {e}")
@@ -179,8 +381,8 @@ def get_device_by_ip(ip):
         dict: The device record if found, None otherwise
     """
     try:
-        device = db_client.devices.get(Device.ip == ip)
-        db_client.flush()  # Ensure we have the latest data
+        doc_id = _get_ip_index().get(ip)
+        device = db_client.devices.get(doc_id=doc_id) if doc_id is not None else None
         return device
     except Exception as e:
         logger.error(f"Error getting device by IP {ip}: {e}")
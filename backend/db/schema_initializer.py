@@ -1,9 +1,8 @@
 from db.tinydb_client import db_client
-import logging
+from utils.logging_config import get_logger
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+# Setup logging
+logger = get_logger('db.schema')
 
 def initialize_all_tables():
     """Ensure the database client is initialized. Specific table setup is handled elsewhere or not needed."""
@@ -25,13 +24,14 @@ def reset_all_tables():
         all_table_names_in_main_db = db_client.db.tables()
         
         tables_to_keep = {'whitelist', 'blacklist'}
+        tables_to_reset = [name for name in all_table_names_in_main_db if name not in tables_to_keep]
         
-        for table_name in all_table_names_in_main_db:
-            if table_name not in tables_to_keep:
-                db_client.db.drop_table(table_name)
-                logger.info(f"Dropped table: {table_name} from main DB")
-            else:
-                logger.info(f"Kept table: {table_name} in main DB")
+        # Truncate rather than drop so table handles held elsewhere stay valid,
+        # and persist everything with one flush at the end
+        for table_name in tables_to_reset:
+            db_client.db.table(table_name).truncate()
+        db_client.flush()
+        logger.info(f"Reset tables in main DB: {', '.join(tables_to_reset) or 'none'}")
 
         # Re-initialize any necessary structures for the kept tables if needed (currently none defined here)
         # initialize_all_tables() # This function is now minimal, so calling it might be for logging/consistency
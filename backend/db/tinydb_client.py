@@ -2,9 +2,15 @@ from tinydb import TinyDB
 from tinydb.storages import JSONStorage
 from tinydb.middlewares import CachingMiddleware
 import os
+import threading
 from utils.path_utils import get_data_folder
 from utils.logging_config import get_logger
 
+try:
+    import orjson
+except ImportError:  # Optional: fall back to TinyDB's stdlib json storage
+    orjson = None
+
 # Get logger for database operations
 logger = get_logger('db.tinydb')
 
@@ -12,6 +18,71 @@ logger = get_logger('db.tinydb')
 DB_PATH = os.path.join(get_data_folder(), "netpilot.json")
 DEVICES_DB_PATH = os.path.join(get_data_folder(), "devices.json")
 
+# How long schedule_flush() waits before writing, so bursts of writes share one flush
+FLUSH_DELAY_SECONDS = 0.5
+
+class OrjsonStorage(JSONStorage):
+    """JSONStorage that parses and serializes with orjson, which is much faster than json for full-file flushes."""
+
+    def __init__(self, path, create_dirs=False, encoding='utf-8', access_mode='r+', **kwargs):
+        # orjson writes non-ASCII characters as-is, so the file must be UTF-8 whatever the platform default
+        super().__init__(path, create_dirs=create_dirs, encoding=encoding, access_mode=access_mode, **kwargs)
+
+    def read(self):
+        self._handle.seek(0, os.SEEK_END)
+        if not self._handle.tell():
+            # Empty file - let TinyDB initialize it
+            return None
+        self._handle.seek(0)
+        return orjson.loads(self._handle.read())
+
+    def write(self, data):
+        self._handle.seek(0)
+        self._handle.write(orjson.dumps(data).decode('utf-8'))
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        # Drop leftover bytes if the file got shorter
+        self._handle.truncate()
+
+# Storage used by both databases
+DB_STORAGE = OrjsonStorage if orjson is not None else JSONStorage
+
+class LockedCachingMiddleware(CachingMiddleware):
+    """
+    CachingMiddleware that is safe to flush from the schedule_flush() timer thread.
+
+    Writes and flushes share one lock, and a flush only clears the writes it
+    actually saved: one that lands while the file is being written stays counted,
+    so the next flush (or close()) persists it instead of skipping it.
+    """
+
+    def __init__(self, storage_cls):
+        super().__init__(storage_cls)
+        # Reentrant: write() flushes by itself once WRITE_CACHE_SIZE is reached
+        self._lock = threading.RLock()
+
+    def write(self, data):
+        with self._lock:
+            super().write(data)
+
+    def flush(self):
+        with self._lock:
+            pending = self._cache_modified_count
+            if pending > 0:
+                self.storage.write(self.cache)
+                self._cache_modified_count -= pending
+
+def index_by_ip(table):
+    """
+    Map each IP address in a table to the doc_id of its first document, in one scan.
+
+    Used to build the lazily cached IP indexes of the device and list repositories.
+    """
+    index = {}
+    for document in table.all():
+        index.setdefault(document.get('ip'), document.doc_id)
+    return index
+
 class TinyDBClient:
     _instance = None
     
@@ -26,20 +97,25 @@ class TinyDBClient:
             return
 
         try:
+            self._closed = False
+            # Pending deferred flush started by schedule_flush(), if any
+            self._flush_timer = None
+            self._flush_timer_lock = threading.Lock()
+
             # Ensure data directory exists
             os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
             
             # Initialize main TinyDB with explicit caching middleware
             self.db = TinyDB(
                 DB_PATH, 
-                storage=CachingMiddleware(JSONStorage)
+                storage=LockedCachingMiddleware(DB_STORAGE)
             )
             logger.info(f"TinyDB initialized with caching middleware at {DB_PATH}")
             
             # Initialize devices TinyDB with explicit caching middleware
             self.devices_db = TinyDB(
                 DEVICES_DB_PATH,
-                storage=CachingMiddleware(JSONStorage)
+                storage=LockedCachingMiddleware(DB_STORAGE)
             )
             logger.info(f"Devices TinyDB initialized with caching middleware at {DEVICES_DB_PATH}")
             
@@ -74,12 +150,37 @@ class TinyDBClient:
         except Exception as e:
             logger.error(f"Error flushing database: {str(e)}", exc_info=True)
     
+    def schedule_flush(self):
+        """
+        Persist cached writes shortly instead of immediately.
+
+        Writes made before the delay expires are saved by the same flush.
+        close() flushes anything still pending.
+        """
+        with self._flush_timer_lock:
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(FLUSH_DELAY_SECONDS, self._run_scheduled_flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def _run_scheduled_flush(self):
+        with self._flush_timer_lock:
+            self._flush_timer = None
+        self.flush()
+
     def close(self):
-        """Close the database connections and flush any pending writes."""
+        """Close the database connections and flush any pending writes. Safe to call more than once."""
+        if self._closed:
+            return
         try:
+            with self._flush_timer_lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
             self.flush()
             self.db.close()
             self.devices_db.close()
+            self._closed = True
             logger.info("TinyDB connections closed")
         except Exception as e:
             logger.error(f"Error closing TinyDB connections: {str(e)}", exc_info=True)
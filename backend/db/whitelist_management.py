@@ -1,15 +1,23 @@
-from tinydb import Query
-from db.tinydb_client import db_client
+from db.tinydb_client import db_client, index_by_ip
 from datetime import datetime
 from utils.logging_config import get_logger
-from db.device_repository import get_mac_from_ip
+from db.device_repository import get_device_by_ip, get_devices_by_ip
 
 # Setup logging
 logger = get_logger('db.whitelist')
 
 # Use the initialized tables from db_client
 whitelist_table = db_client.bandwidth_whitelist
-Device = Query()
+
+# IP -> doc_id index over the whitelist table, built lazily on first use and kept
+# in step with add/remove/clear so membership checks don't scan the table.
+_ip_index = None
+
+def _get_ip_index():
+    global _ip_index
+    if _ip_index is None:
+        _ip_index = index_by_ip(whitelist_table)
+    return _ip_index
 
 def get_whitelist():
     """
@@ -19,13 +27,26 @@ def get_whitelist():
         list: List of whitelisted device entries
     """
     try:
-        db_client.flush()  # Ensure we have the latest data before reading
+        # The caching storage is authoritative in-process, so no flush is needed to read
         entries = whitelist_table.all()
         return entries
     except Exception as e:
         logger.error(f"Error retrieving whitelist: {str(e)}", exc_info=True)
         return []
 
+def get_whitelist_ips():
+    """
+    Retrieves just the IP addresses of the whitelisted devices
+    
+    Returns:
+        list: IP addresses in the whitelist
+    """
+    try:
+        return [entry['ip'] for entry in whitelist_table.all()]
+    except Exception as e:
+        logger.error(f"Error retrieving whitelist IPs: {str(e)}", exc_info=True)
+        return []
+
 def add_to_whitelist(ip, name=None, description=None):
     """
     Adds a device to the whitelist database
@@ -43,12 +64,13 @@ def add_to_whitelist(ip, name=None, description=None):
     """
     try:
         # Check if IP already exists in whitelist
-        if whitelist_table.search(Device.ip == ip):
+        if ip in _get_ip_index():
             logger.warning(f"Attempted to add IP {ip} that already exists in whitelist")
             raise ValueError(f"Device with IP {ip} already in whitelist")
         
-        # Get MAC address from devices table
-        mac = get_mac_from_ip(ip)
+        # Get MAC address (and hostname) from devices table
+        device = get_device_by_ip(ip)
+        mac = device.get('mac') if device else None
         if not mac:
             logger.warning(f"Attempted to add IP {ip} that does not exist in devices table")
             raise ValueError(f"Device with IP {ip} not found in devices table")
@@ -57,12 +79,13 @@ def add_to_whitelist(ip, name=None, description=None):
         entry = {
             'ip': ip,
             'mac': mac,
+            'hostname': device.get('hostname', "Unknown"),
             'name': name or f"Device-{ip}",
             'description': description or "",
-            'added_at': str(datetime.now())
+            'added_at': datetime.now().isoformat(timespec='seconds')
         }
-        whitelist_table.insert(entry)
-        db_client.flush()  # Ensure the entry is persisted
+        _get_ip_index()[ip] = whitelist_table.insert(entry)
+        db_client.schedule_flush()
         
         logger.info(f"Added device with IP {ip} to whitelist")
         return entry
@@ -70,6 +93,54 @@ def add_to_whitelist(ip, name=None, description=None):
         logger.error(f"Error adding to whitelist: {str(e)}", exc_info=True)
         raise
 
+def bulk_add_to_whitelist(ips):
+    """
+    Adds several devices to the whitelist database with a single insert
+    
+    IPs that are already whitelisted or not in the devices table are skipped.
+    
+    Args:
+        ips (list): IP addresses of the devices
+        
+    Returns:
+        tuple: (list of entries that were added, list of IPs that were skipped)
+    """
+    try:
+        index = _get_ip_index()
+        devices_by_ip = get_devices_by_ip()
+        added_at = datetime.now().isoformat(timespec='seconds')
+        
+        entries = []
+        skipped = []
+        seen = set()
+        for ip in ips:
+            device = devices_by_ip.get(ip)
+            if ip in index or ip in seen or not device or not device.get('mac'):
+                skipped.append(ip)
+                continue
+            seen.add(ip)
+            entries.append({
+                'ip': ip,
+                'mac': device['mac'],
+                'hostname': device.get('hostname', "Unknown"),
+                'name': f"Device-{ip}",
+                'description': "",
+                'added_at': added_at
+            })
+        
+        if entries:
+            doc_ids = whitelist_table.insert_multiple(entries)
+            index.update((entry['ip'], doc_id) for entry, doc_id in zip(entries, doc_ids))
+            db_client.schedule_flush()
+        
+        if skipped:
+            logger.warning(f"Skipped {len(skipped)} IPs already in whitelist or not in devices table: {skipped}")
+        logger.info(f"Added {len(entries)} devices to whitelist")
+        return entries, skipped
+    except Exception as e:
+        logger.error(f"Error bulk adding to whitelist: {str(e)}", exc_info=True)
+        raise
+
 def remove_from_whitelist(ip):
     """
     Removes a device from the whitelist database
@@ -84,14 +155,12 @@ def remove_from_whitelist(ip):
         ValueError: If the IP was not found in whitelist
     """
     try:
-        # Check if IP exists in whitelist
-        if not whitelist_table.search(Device.ip == ip):
+        doc_id = _get_ip_index().pop(ip, None)
+        if doc_id is None:
             logger.warning(f"Attempted to remove IP {ip} that does not exist in whitelist")
             raise ValueError(f"Device with IP {ip} not found in whitelist")
-        
-        # Remove from whitelist
-        whitelist_table.remove(Device.ip == ip)
-        db_client.flush()  # Ensure the removal is persisted
+        whitelist_table.remove(doc_ids=[doc_id])
+        db_client.schedule_flush()
         
         logger.info(f"Removed device with IP {ip} from whitelist")
         return ip
@@ -109,10 +178,15 @@ def clear_whitelist():
     Raises:
         Exception: If there was an error clearing the whitelist
     """
+    global _ip_index
     try:
+        if len(whitelist_table) == 0:
+            # Nothing to clear - don't rewrite the database file
+            return True
         logger.info("Clearing all entries from whitelist")
         whitelist_table.truncate()
-        db_client.flush()  # Ensure the clearing is persisted
+        _ip_index = {}
+        db_client.schedule_flush()
         logger.info("Successfully cleared whitelist")
         return True
     except Exception as e:
@@ -28,7 +28,7 @@ def get_blocked():
 def block():
     """Block a device by IP address"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
         ip = data.get("ip")
         if not ip:
             return jsonify(error("Missing 'ip' in request body", status_code=400))
@@ -46,7 +46,7 @@ def block():
 def unblock():
     """Unblock a device by IP address"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
         ip = data.get("ip")
         if not ip:
             return jsonify(error("Missing 'ip' in request body", status_code=400))
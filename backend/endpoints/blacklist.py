@@ -4,6 +4,7 @@ from utils.response_helpers import error
 from services.blacklist_service import (
     get_blacklist_devices,
     add_device_to_blacklist,
+    add_devices_to_blacklist,
     remove_device_from_blacklist,
     clear_blacklist,
     get_blacklist_limit_rate,
@@ -30,9 +31,15 @@ def get_blacklist():
 
 @blacklist_bp.route("/blacklist", methods=["POST"])
 def add_to_blacklist():
-    """Add a device to the blacklist"""
+    """Add a device, or a list of devices under 'ips', to the blacklist"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
+        ips = data.get("ips")
+        if ips is not None:
+            if not isinstance(ips, list) or not ips or not all(isinstance(ip, str) and ip for ip in ips):
+                return jsonify(error("'ips' must be a non-empty list of IP addresses", status_code=400))
+            return jsonify(add_devices_to_blacklist(ips))
+            
         ip = data.get("ip")
         if not ip:
             return jsonify(error("Missing 'ip' in request body", status_code=400))
@@ -47,7 +54,7 @@ def add_to_blacklist():
 def remove_from_blacklist():
     """Remove a device from the blacklist"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
         ip = data.get("ip")
         if not ip:
             return jsonify(error("Missing 'ip' in request body", status_code=400))
@@ -82,7 +89,7 @@ def get_limit_rate():
 def set_limit_rate():
     """Set the blacklist bandwidth limit rate"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
         rate = data.get("rate")
         if not rate:
             return jsonify(error("Missing 'rate' in request body", status_code=400))
@@ -107,7 +114,7 @@ def get_full_rate():
 def set_full_rate():
     """Set the blacklist full bandwidth rate"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
         rate = data.get("rate")
         if not rate:
             return jsonify(error("Missing 'rate' in request body", status_code=400))
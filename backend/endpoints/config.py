@@ -12,7 +12,7 @@ logger = get_logger('config.endpoints')
 def set_admin():
     """Set the admin username and password for the web interface."""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
         username = data.get("username")
         password = data.get("password")
         
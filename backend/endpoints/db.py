@@ -46,7 +46,7 @@ def get_device(mac):
 def update_device(mac):
     """Update a device's name."""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
         name = data.get("name")
         if not name:
             return jsonify(error("Missing 'name' in request body", status_code=400))
@@ -35,7 +35,7 @@ def enable_wifi_route():
 def change_password():
     """Change the WiFi password"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
         password = data.get("password")
         if not password:
             return jsonify(error("Missing 'password' in request body", status_code=400))
@@ -82,7 +82,7 @@ def get_wifi_ssid_route():
 def change_ssid():
     """Change the WiFi SSID"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
         ssid = data.get("ssid")
         interface = data.get("interface", 0)
         
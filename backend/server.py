@@ -4,7 +4,9 @@ from utils.path_utils import get_data_folder
 from db.schema_initializer import initialize_all_tables
 from utils.ssh_client import ssh_manager
 from db.tinydb_client import db_client
+from services.wifi_management import flush_wifi_reload
 from utils.logging_config import get_logger
+from utils.json_provider import JSON_PROVIDER
 import os
 import atexit
 from dotenv import load_dotenv
@@ -39,6 +41,7 @@ if server_port is None:
 server_port = int(server_port)
 
 app = Flask(__name__)
+app.json = JSON_PROVIDER(app)
 CORS(app, resources={r"/*": {"origins": "*"}})
 
 # Initialize database tables
@@ -60,9 +63,9 @@ logger.info("API blueprints registered")
 # Function to clean up resources on exit
 def cleanup_resources():
     logger.info("Cleaning up resources")
+    flush_wifi_reload()  # Apply any pending WiFi changes while SSH is still open
     ssh_manager.close_connection()
-    db_client.flush()
-    db_client.close()
+    db_client.close()  # Flushes pending writes before closing
     logger.info("Resources cleaned up")
 
 # Register cleanup function on application exit
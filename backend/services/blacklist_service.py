@@ -2,30 +2,34 @@ from utils.logging_config import get_logger
 from utils.response_helpers import success
 from utils.config_manager import config_manager
 from services.mode_state_service import get_current_mode_value, set_current_mode_value
-from db.tinydb_client import db_client
-from db.blacklist_management import add_to_blacklist, remove_from_blacklist, get_blacklist
+from db.blacklist_management import add_to_blacklist, bulk_add_to_blacklist, remove_from_blacklist, get_blacklist, get_blacklist_ips
+from db.blacklist_management import clear_blacklist as clear_blacklist_entries
 from services.reset_rules import reset_all_tc_rules
-from tinydb import Query
 # Import the new helper
 from utils.traffic_control_helpers import setup_traffic_rules
 # Import to get hostname from devices table
-from db.device_repository import get_device_by_mac
+from db.device_repository import get_devices_by_mac, normalize_mac
 
 logger = get_logger('services.blacklist')
 
-# Get the blacklist table directly
-blacklist_table = db_client.bandwidth_blacklist
-Device = Query()
+# Rates used when the blacklist config does not set them
+DEFAULT_BLACKLIST_LIMIT_RATE = "2mbit"
+DEFAULT_BLACKLIST_FULL_RATE = "1000mbit"
 
 def get_blacklist_devices():
     """Get all devices in the blacklist"""
     try:
         devices = get_blacklist()
         formatted_devices = []
+        devices_by_mac = None
         for device in devices:
-            # Get the actual hostname from the devices table using MAC address
-            device_info = get_device_by_mac(device.get("mac"))
-            actual_hostname = device_info.get("hostname", "Unknown") if device_info else "Unknown"
+            actual_hostname = device.get("hostname")
+            if actual_hostname is None:
+                # Entries added before hostnames were stored on them: look it up by MAC
+                if devices_by_mac is None:
+                    devices_by_mac = get_devices_by_mac()
+                device_info = devices_by_mac.get(normalize_mac(device.get("mac")))
+                actual_hostname = device_info.get("hostname", "Unknown") if device_info else "Unknown"
             
             formatted_devices.append({
                 "ip": device.get("ip"),
@@ -41,12 +45,12 @@ def get_blacklist_devices():
 def _apply_blacklist_rules():
     """Helper to apply current blacklist rules."""
     logger.info("Applying blacklist TC rules.")
-    db_client.flush()
-    raw_blacklist_devices = get_blacklist()
-    blacklist_ips = [device['ip'] for device in raw_blacklist_devices]
+    blacklist_ips = get_blacklist_ips()
     
-    limit_rate_config = get_blacklist_limit_rate()['data']['rate']
-    full_rate_config = get_blacklist_full_rate()['data']['rate']
+    # One config read for both rates
+    config = config_manager.load_config('blacklist')
+    limit_rate_config = config.get('Limit_Rate', DEFAULT_BLACKLIST_LIMIT_RATE)
+    full_rate_config = config.get('Full_Rate', DEFAULT_BLACKLIST_FULL_RATE)
 
     setup_traffic_rules(
         mode='blacklist',
@@ -69,14 +73,27 @@ def add_device_to_blacklist(ip):
         logger.error(f"Error adding device to blacklist: {str(e)}", exc_info=True)
         raise
 
+def add_devices_to_blacklist(ips):
+    """Add several devices to the blacklist, applying the TC rules once"""
+    try:
+        added, skipped = bulk_add_to_blacklist(ips)
+        
+        if added and get_current_mode_value() == 'blacklist':
+            _apply_blacklist_rules()
+        
+        return success(
+            message=f"Added {len(added)} devices to blacklist",
+            data={"added": [entry["ip"] for entry in added], "skipped": skipped}
+        )
+    except Exception as e:
+        logger.error(f"Error adding devices to blacklist: {str(e)}", exc_info=True)
+        raise
+
 def remove_device_from_blacklist(ip):
     """Remove a device from the blacklist"""
     try:
-        device_info = blacklist_table.get(Device.ip == ip)
-        if not device_info:
+        if not remove_from_blacklist(ip):
             raise ValueError(f"Device with IP {ip} not found in blacklist")
-
-        remove_from_blacklist(ip)
         
         if get_current_mode_value() == 'blacklist':
             _apply_blacklist_rules()
@@ -89,17 +106,15 @@ def remove_device_from_blacklist(ip):
 def clear_blacklist():
     """Clear all devices from the blacklist"""
     try:
-        devices_cleared = False
         current_devices = get_blacklist()
 
         if not current_devices:
             return success(message="Blacklist is already empty.")
 
-        for device in current_devices:
-            remove_from_blacklist(device["ip"])
-            devices_cleared = True
+        # Truncate in one write rather than matching a query per entry
+        clear_blacklist_entries()
         
-        if devices_cleared and get_current_mode_value() == 'blacklist':
+        if get_current_mode_value() == 'blacklist':
             _apply_blacklist_rules() # Apply rules based on the now empty blacklist
         
         return success(message="Blacklist cleared")
@@ -111,7 +126,7 @@ def get_blacklist_limit_rate():
     """Get the current blacklist bandwidth limit rate"""
     try:
         config = config_manager.load_config('blacklist')
-        return success(data={"rate": config.get('Limit_Rate', "2mbit")}) # Default if not set
+        return success(data={"rate": config.get('Limit_Rate', DEFAULT_BLACKLIST_LIMIT_RATE)}) # Default if not set
     except Exception as e:
         logger.error(f"Error getting blacklist limit rate: {str(e)}", exc_info=True)
         raise
@@ -145,7 +160,7 @@ def get_blacklist_full_rate():
     """Get the current blacklist full bandwidth rate"""
     try:
         config = config_manager.load_config('blacklist')
-        return success(data={"rate": config.get('Full_Rate', "1000mbit")}) # Default if not set
+        return success(data={"rate": config.get('Full_Rate', DEFAULT_BLACKLIST_FULL_RATE)}) # Default if not set
     except Exception as e:
         logger.error(f"Error getting blacklist full rate: {str(e)}", exc_info=True)
         raise
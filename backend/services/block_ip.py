@@ -1,10 +1,24 @@
 from utils.ssh_client import ssh_manager
 from utils.logging_config import get_logger
 from utils.response_helpers import success
-from db.device_repository import get_device_by_ip, get_device_by_mac
+from services.wifi_management import request_wifi_reload
+from db.device_repository import get_device_by_ip, get_devices_by_mac, normalize_mac
 
 logger = get_logger('services.block_ip')
 
+# Block/unblock run as one SSH exec each; the commands are joined once here and
+# only the MAC address is filled in per request. The WiFi reload that applies them
+# runs separately, so blocking several devices in a row shares reloads.
+BLOCK_MAC_COMMAND = " && ".join([
+    "uci add_list wireless.@wifi-iface[1].maclist='{mac_address}'",
+    "uci set wireless.@wifi-iface[1].macfilter='deny'",
+    "uci commit wireless"
+])
+UNBLOCK_MAC_COMMAND = " && ".join([
+    "uci del_list wireless.@wifi-iface[1].maclist='{mac_address}'",
+    "uci commit wireless"
+])
+
 def block_device_by_ip(target_ip):
     """
     Blocks a device by IP address (translates IP to MAC and blocks it)
@@ -15,21 +29,16 @@ def block_device_by_ip(target_ip):
         if not device or not device.get('mac'):
             raise ValueError(f"IP {target_ip} not found in network.")
 
-        commands_block = [
-            "uci add_list wireless.@wifi-iface[1].maclist='{mac_address}'",
-            "uci set wireless.@wifi-iface[1].macfilter='deny'",
-            "uci commit wireless",
-            "wifi"
-        ]
-
         # Block the MAC address
-        for cmd in commands_block:
-            cmd = cmd.format(mac_address=device['mac'])
-            output, error = ssh_manager.execute_command(cmd)
-            if error:
-                raise Exception(f"Failed to execute command: {cmd}, Error: {error}")
+        cmd = BLOCK_MAC_COMMAND.format(mac_address=device['mac'])
+        output, error = ssh_manager.execute_command(cmd)
+        if error:
+            raise Exception(f"Failed to execute command: {cmd}, Error: {error}")
+        message = f"Device with IP {target_ip} (MAC {device['mac']}) is blocked."
+        if not request_wifi_reload():
+            message += " The WiFi reload that applies it is pending."
 
-        return success(message=f"Device with IP {target_ip} (MAC {device['mac']}) is blocked.")
+        return success(message=message)
     except Exception as e:
         logger.error(f"Error blocking device: {str(e)}", exc_info=True)
         raise
@@ -44,20 +53,16 @@ def unblock_device_by_ip(target_ip):
         if not device or not device.get('mac'):
             raise ValueError(f"IP {target_ip} not found in network.")
 
-        commands_unblock = [
-            "uci del_list wireless.@wifi-iface[1].maclist='{mac_address}'",
-            "uci commit wireless",
-            "wifi"
-        ]
-
         # Unblock the MAC address
-        for cmd in commands_unblock:
-            cmd = cmd.format(mac_address=device['mac'])
-            output, error = ssh_manager.execute_command(cmd)
-            if error:
-                raise Exception(f"Failed to execute command: {cmd}, Error: {error}")
+        cmd = UNBLOCK_MAC_COMMAND.format(mac_address=device['mac'])
+        output, error = ssh_manager.execute_command(cmd)
+        if error:
+            raise Exception(f"Failed to execute command: {cmd}, Error: {error}")
+        message = f"Device with IP {target_ip} (MAC {device['mac']}) is unblocked."
+        if not request_wifi_reload():
+            message += " The WiFi reload that applies it is pending."
 
-        return success(message=f"Device with IP {target_ip} (MAC {device['mac']}) is unblocked.")
+        return success(message=message)
     except Exception as e:
         logger.error(f"Error unblocking device: {str(e)}", exc_info=True)
         raise
@@ -74,11 +79,15 @@ def get_blocked_devices():
 
         # Parse the output
         blocked_macs = output.strip().split() if output.strip() else []
+        if not blocked_macs:
+            # Nothing blocked - no need to read the devices table
+            return success(data=[])
         
         # Get device info for each blocked MAC
         blocked_devices = []
+        devices_by_mac = get_devices_by_mac()
         for mac in blocked_macs:
-            device = get_device_by_mac(mac)
+            device = devices_by_mac.get(normalize_mac(mac))
             if device:
                 blocked_devices.append({
                     "ip": device.get("ip", "Unknown"),
@@ -5,7 +5,7 @@ import netifaces
 import ipaddress
 from utils.response_helpers import success
 from utils.logging_config import get_logger
-from db.device_repository import register_device
+from db.device_repository import register_devices
 from utils.network_utils import print_results
 
 logger = get_logger('services.network_scanner')
@@ -20,16 +20,17 @@ def scan_ip_range(ip_range):
         arp_request = Ether(dst="ff:ff:ff:ff:ff:ff") / ARP(pdst=ip_range)
         result = srp(arp_request, timeout=1, verbose=False)[0]
 
-        devices = []
+        # Deduplicate by (ip, mac) in a dict instead of scanning the list per reply
+        devices = {}
         for sent, received in result:
-            device = {
-                "ip": received.psrc,
-                "mac": received.hwsrc
-            }
-            if device not in devices:  # Avoid duplicates
-                devices.append(device)
-
-        return success(data=devices)
+            key = (received.psrc, received.hwsrc)
+            if key not in devices:  # Avoid duplicates
+                devices[key] = {
+                    "ip": received.psrc,
+                    "mac": received.hwsrc
+                }
+
+        return success(data=list(devices.values()))
     except Exception as e:
         logger.error(f"Error scanning network: {str(e)}", exc_info=True)
         raise
@@ -73,14 +74,17 @@ def scan_network():
         # Scan the network
         result = scan_ip_range(str(network))
         
-        # Register each device in the database
+        # Register all discovered devices in the database in one batch
+        scanned_devices = []
         for device in result.get("data", []):
             try:
                 hostname = socket.getfqdn(device["ip"])
-                register_device(device["ip"], device["mac"], hostname)
+                scanned_devices.append({"ip": device["ip"], "mac": device["mac"], "hostname": hostname})
             except Exception as e:
-                logger.warning(f"Failed to register device {device['ip']}: {str(e)}")
+                logger.warning(f"Failed to resolve hostname for device {device['ip']}: {str(e)}")
                 continue
+        if not register_devices(scanned_devices):
+            logger.error(f"Failed to save {len(scanned_devices)} scanned devices to the database")
         
         return result
     except Exception as e:
@@ -1,11 +1,23 @@
 from utils.logging_config import get_logger
 from utils.ssh_client import ssh_manager
 from utils.response_helpers import success
-from services.block_ip import get_blocked_devices, unblock_device_by_ip
+from services.block_ip import get_blocked_devices
+from services.wifi_management import WIFI_RELOAD_COMMAND
 from db.device_repository import get_all_devices
+from utils.traffic_control_helpers import get_all_network_interfaces_helper, invalidate_network_interfaces_cache
 
 logger = get_logger('services.reset_rules')
 
+# Resets the OpenWrt blocklist settings. Deleting the whole maclist unblocks every
+# device at once, so there is no per-device del_list/commit/wifi round. Joined with
+# ';' so a failing step doesn't stop the rest.
+RESET_BLOCKLIST_COMMAND = " ; ".join([
+    "uci set wireless.@wifi-iface[1].macfilter='disable'",
+    "uci delete wireless.@wifi-iface[1].maclist",
+    "uci commit wireless",
+    WIFI_RELOAD_COMMAND
+])
+
 def reset_all_tc_rules():
     """
     Remove all traffic control (bandwidth limit) rules from the router.
@@ -23,18 +35,12 @@ def reset_all_tc_rules():
         else:
             logger.info("Successfully flushed iptables mangle table.")
 
-        # Get all interfaces first
-        iface_cmd = "ip link show | grep -v '@' | grep -v 'lo:' | awk -F': ' '{print $2}' | cut -d'@' -f1"
-        interfaces_output, iface_error = ssh_manager.execute_command(iface_cmd)
-        
-        if iface_error:
-            raise Exception(f"Failed to fetch network interfaces: {iface_error}")
+        # Same (cached) interface list the rules were set up on, rather than
+        # parsing `ip link show` through a grep/awk/cut pipeline on the router
+        interfaces = get_all_network_interfaces_helper()
         
         # For each interface, remove all tc rules
-        for interface in interfaces_output.strip().split('\n'):
-            if not interface.strip():
-                continue
-            
+        for interface in interfaces:
             # Remove all qdisc rules. Capture stderr.
             cmd = f"tc qdisc del dev {interface} root"
             output, error = ssh_manager.execute_command(cmd) # error will now contain tc's stderr
@@ -66,18 +72,13 @@ def unblock_all_devices():
         return blocked_response
         
     blocked_devices = blocked_response.get("data", [])
-    unblocked_count = 0
-    
-    for device in blocked_devices:
-        if device["ip"] != "Unknown":
-            unblock_device_by_ip(device["ip"])
-            unblocked_count += 1
+    unblocked_count = sum(1 for device in blocked_devices if device["ip"] != "Unknown")
             
-    # Also reset the OpenWrt blocklist settings
-    ssh_manager.execute_command("uci set wireless.@wifi-iface[1].macfilter='disable'")
-    ssh_manager.execute_command("uci delete wireless.@wifi-iface[1].maclist")
-    ssh_manager.execute_command("uci commit wireless")
-    ssh_manager.execute_command("wifi")
+    # Reset the OpenWrt blocklist settings in one SSH exec
+    output, error = ssh_manager.execute_command(RESET_BLOCKLIST_COMMAND)
+    invalidate_network_interfaces_cache()  # The WiFi reload can change the wlan interfaces
+    if error:
+        logger.warning(f"Blocklist reset reported errors: {error}")
     
     return success(f"Unblocked {unblocked_count} devices")
 
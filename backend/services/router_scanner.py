@@ -1,14 +1,23 @@
 import requests
 import time
 import re
+import concurrent.futures
 from utils.ssh_client import ssh_manager
 from utils.response_helpers import success
-from db.device_repository import register_device
+from db.device_repository import register_devices
 import ipaddress
 from utils.logging_config import get_logger
 
 logger = get_logger('services.router_scanner')
 
+# Compiled once rather than per ARP table field
+MAC_ADDRESS_PATTERN = re.compile(r'([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})')
+# Neighbour states treated as connected
+ACTIVE_ARP_STATES = frozenset(["REACHABLE", "DELAY", "PROBE"])
+# Router commands for the DHCP leases (hostnames) and the ARP table (active devices)
+DHCP_LEASES_COMMAND = "cat /tmp/dhcp.leases"
+ARP_TABLE_COMMAND = "ip neigh show | grep -v FAILED"
+
 def get_mac_vendor(mac):
     """
     Queries macvendors.com to get the vendor for a given MAC address.
@@ -34,16 +43,20 @@ def scan_network_via_router():
     # Assume /24 subnet for typical home routers; adjust if you want to detect dynamically
     router_network = ipaddress.ip_network(router_ip + '/24', strict=False)
 
-    # Get DHCP leases for hostname information
-    dhcp_command = "cat /tmp/dhcp.leases"
-    dhcp_output, dhcp_error = ssh_manager.execute_command(dhcp_command)
+    # DHCP leases (for hostname information) and the ARP table (for ACTIVE devices)
+    # are independent, so fetch them concurrently over separate SSH channels
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        dhcp_future = executor.submit(ssh_manager.execute_command, DHCP_LEASES_COMMAND)
+        arp_future = executor.submit(ssh_manager.execute_command, ARP_TABLE_COMMAND)
+        dhcp_output, dhcp_error = dhcp_future.result()
+        arp_output, arp_error = arp_future.result()
 
     if dhcp_error:
         raise Exception("Failed to fetch DHCP leases")
 
     # Create a lookup dictionary from DHCP leases
     dhcp_info = {}
-    for line in dhcp_output.split("\n"):
+    for line in dhcp_output.splitlines():
         parts = line.split()
         if len(parts) >= 4:
             mac = parts[1].lower()
@@ -55,26 +68,22 @@ def scan_network_via_router():
     # Log DHCP scan results
     logger.info(f"DHCP leases found: {len(dhcp_info)} devices")
 
-    # Get ARP table to find ACTIVE devices
-    arp_command = "ip neigh show | grep -v FAILED"
-    arp_output, arp_error = ssh_manager.execute_command(arp_command)
-
     if arp_error:
         raise Exception("Failed to fetch ARP table")
     
+    # Split the output once and reuse the lines
+    arp_lines = arp_output.splitlines()
+
     # Log basic ARP scan info
-    logger.info(f"ARP scan completed, processing {len(arp_output.split(chr(10)))} entries")
+    logger.info(f"ARP scan completed, processing {len(arp_lines)} entries")
 
     # Process active devices from ARP table - group by MAC address
     device_map = {}
-    for line in arp_output.split("\n"):
-        if not line.strip():
-            continue
-            
+    for line in arp_lines:
         parts = line.split()
         if len(parts) >= 4:
             ip = parts[0]
-            mac_idx = next((i for i, part in enumerate(parts) if re.match(r'([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})', part)), -1)
+            mac_idx = next((i for i, part in enumerate(parts) if MAC_ADDRESS_PATTERN.match(part)), -1)
             if mac_idx == -1:
                 continue
                 
@@ -82,7 +91,7 @@ def scan_network_via_router():
             state = parts[-1]
             
             # Include devices in active states (connected but may be in various ARP states)
-            if state in ["REACHABLE", "DELAY", "PROBE"]:
+            if state in ACTIVE_ARP_STATES:
                 # If this MAC is already in our map, we'll update it
                 if mac not in device_map:
                     device_map[mac] = {
@@ -105,7 +114,7 @@ def scan_network_via_router():
                         # Only update if we don't have an IP yet, or if the new IP is in subnet and current isn't
                         if not current_ip or (is_in_subnet and not current_is_in_subnet):
                             device_map[mac]["ipv4"] = ip
-                            logger.debug(f"Prioritized subnet IP for {mac}: {current_ip} -> {ip}")
+                            logger.debug("Prioritized subnet IP for %s: %s -> %s", mac, current_ip, ip)
                     except ValueError:
                         # If IP parsing fails, just use it if we don't have one yet
                         if not current_ip:
@@ -130,7 +139,7 @@ def scan_network_via_router():
                         "hostname": dhcp_device["hostname"],
                         "vendor": None
                     }
-                    logger.debug(f"Added DHCP-only device: {mac} -> {dhcp_device['ip']}")
+                    logger.debug("Added DHCP-only device: %s -> %s", mac, dhcp_device['ip'])
             except ValueError:
                 continue
 
@@ -166,8 +175,7 @@ def scan_network_via_router():
                 })
 
     
-    # Register active devices in database (only one entry per MAC)
-    for device in connected_devices:
-        register_device(device["ip"], device["mac"], device["hostname"])
+    # Register active devices in database (only one entry per MAC) in one batch
+    register_devices(connected_devices)
 
     return success(message="Active devices fetched", data=connected_devices)
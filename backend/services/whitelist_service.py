@@ -2,20 +2,20 @@ from utils.logging_config import get_logger
 from utils.response_helpers import success
 from utils.config_manager import config_manager
 from services.mode_state_service import get_current_mode_value, set_current_mode_value
-from db.tinydb_client import db_client
-from db.whitelist_management import add_to_whitelist, remove_from_whitelist, get_whitelist
+from db.whitelist_management import add_to_whitelist, remove_from_whitelist, get_whitelist, get_whitelist_ips
+from db.whitelist_management import bulk_add_to_whitelist
+from db.whitelist_management import clear_whitelist as clear_whitelist_entries
 from services.reset_rules import reset_all_tc_rules
-from tinydb import Query
 # Import the new helper
 from utils.traffic_control_helpers import setup_traffic_rules
 # Import to get hostname from devices table
-from db.device_repository import get_device_by_mac
+from db.device_repository import get_devices_by_mac, normalize_mac
 
 logger = get_logger('services.whitelist')
 
-# Get the whitelist table directly
-whitelist_table = db_client.bandwidth_whitelist
-Device = Query()
+# Rates used when the whitelist config does not set them
+DEFAULT_WHITELIST_LIMIT_RATE = "50mbit"
+DEFAULT_WHITELIST_FULL_RATE = "1000mbit"
 
 def get_whitelist_devices():
     """Get all devices in the whitelist"""
@@ -25,10 +25,15 @@ def get_whitelist_devices():
         
         # Format the response
         formatted_devices = []
+        devices_by_mac = None
         for device in devices:
-            # Get the actual hostname from the devices table using MAC address
-            device_info = get_device_by_mac(device.get("mac"))
-            actual_hostname = device_info.get("hostname", "Unknown") if device_info else "Unknown"
+            actual_hostname = device.get("hostname")
+            if actual_hostname is None:
+                # Entries added before hostnames were stored on them: look it up by MAC
+                if devices_by_mac is None:
+                    devices_by_mac = get_devices_by_mac()
+                device_info = devices_by_mac.get(normalize_mac(device.get("mac")))
+                actual_hostname = device_info.get("hostname", "Unknown") if device_info else "Unknown"
             
             formatted_devices.append({
                 "ip": device.get("ip"),
@@ -45,12 +50,12 @@ def get_whitelist_devices():
 def _apply_whitelist_rules():
     """Helper to apply current whitelist rules."""
     logger.info("Applying whitelist TC rules.")
-    db_client.flush() 
-    raw_whitelist_devices = get_whitelist()
-    whitelist_ips = [device['ip'] for device in raw_whitelist_devices]
+    whitelist_ips = get_whitelist_ips()
     
-    limit_rate_config = get_whitelist_limit_rate()['data']['rate']
-    full_rate_config = get_whitelist_full_rate()['data']['rate']
+    # One config read for both rates
+    config = config_manager.load_config('whitelist')
+    limit_rate_config = config.get('Limit_Rate', DEFAULT_WHITELIST_LIMIT_RATE)
+    full_rate_config = config.get('Full_Rate', DEFAULT_WHITELIST_FULL_RATE)
 
     setup_traffic_rules(
         mode='whitelist',
@@ -74,15 +79,26 @@ def add_device_to_whitelist(ip):
         logger.error(f"Error adding device to whitelist: {str(e)}", exc_info=True)
         raise
 
+def add_devices_to_whitelist(ips):
+    """Add several devices to the whitelist, applying the TC rules once"""
+    try:
+        added, skipped = bulk_add_to_whitelist(ips)
+        
+        if added and get_current_mode_value() == 'whitelist':
+            _apply_whitelist_rules()
+        
+        return success(
+            message=f"Added {len(added)} devices to whitelist",
+            data={"added": [entry["ip"] for entry in added], "skipped": skipped}
+        )
+    except Exception as e:
+        logger.error(f"Error adding devices to whitelist: {str(e)}", exc_info=True)
+        raise
+
 def remove_device_from_whitelist(ip):
     """Remove a device from the whitelist"""
     try:
-        # Ensure device exists before attempting DB removal to align with add_to_whitelist logic
-        device_info = whitelist_table.get(Device.ip == ip)
-        if not device_info:
-            raise ValueError(f"Device with IP {ip} not found in whitelist")
-
-        remove_from_whitelist(ip) # DB operation
+        remove_from_whitelist(ip) # DB operation, raises ValueError if the IP is not whitelisted
         
         if get_current_mode_value() == 'whitelist':
             _apply_whitelist_rules()
@@ -96,17 +112,15 @@ def clear_whitelist():
     """Clear all devices from the whitelist"""
     try:
         # It's more efficient to clear TC rules once after all DB ops if mode is active
-        devices_cleared = False
-        current_devices = get_whitelist() # Get IPs before clearing
+        current_devices = get_whitelist()
         
         if not current_devices:
              return success(message="Whitelist is already empty.")
 
-        for device in current_devices:
-            remove_from_whitelist(device["ip"]) # Just DB op
-            devices_cleared = True
+        # Truncate in one write rather than matching a query per entry
+        clear_whitelist_entries()
         
-        if devices_cleared and get_current_mode_value() == 'whitelist':
+        if get_current_mode_value() == 'whitelist':
             _apply_whitelist_rules() # Apply rules based on the now empty whitelist
         
         return success(message="Whitelist cleared")
@@ -118,7 +132,7 @@ def get_whitelist_limit_rate():
     """Get the current whitelist bandwidth limit rate"""
     try:
         config = config_manager.load_config('whitelist')
-        return success(data={"rate": config.get('Limit_Rate', "50mbit")}) # Default if not set
+        return success(data={"rate": config.get('Limit_Rate', DEFAULT_WHITELIST_LIMIT_RATE)}) # Default if not set
     except Exception as e:
         logger.error(f"Error getting whitelist limit rate: {str(e)}", exc_info=True)
         raise
@@ -153,7 +167,7 @@ def get_whitelist_full_rate():
     """Get the current whitelist full bandwidth rate"""
     try:
         config = config_manager.load_config('whitelist')
-        return success(data={"rate": config.get('Full_Rate', "1000mbit")}) # Default if not set
+        return success(data={"rate": config.get('Full_Rate', DEFAULT_WHITELIST_FULL_RATE)}) # Default if not set
     except Exception as e:
         logger.error(f"Error getting whitelist full rate: {str(e)}", exc_info=True)
         raise
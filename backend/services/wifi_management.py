@@ -1,10 +1,89 @@
+import threading
 import time
 from utils.ssh_client import ssh_manager
 from utils.response_helpers import success, error
 from utils.logging_config import get_logger
+from utils.traffic_control_helpers import invalidate_network_interfaces_cache
 
 logger = get_logger('services.wifi')
 
+# Applies committed wireless changes through netifd over ubus - what `wifi reload`
+# does, without the /sbin/wifi script or the full radio down/up of plain `wifi`.
+# netifd reconfigures in the background, so the call returns right away.
+WIFI_RELOAD_COMMAND = "ubus call network reload"
+
+# Reloads requested within this long of the last one share a single follow-up
+# reload, so a burst of changes restarts the radios at most twice
+WIFI_RELOAD_DELAY_SECONDS = 2.0
+
+# Follow-up reload queued by request_wifi_reload(), if any
+_reload_timer = None
+# time.monotonic() of the last reload started by request_wifi_reload()
+_last_reload_at = None
+_reload_timer_lock = threading.Lock()
+
+def request_wifi_reload():
+    """
+    Reload WiFi on the router to apply committed uci changes.
+
+    Reloads right away unless the last reload started less than
+    WIFI_RELOAD_DELAY_SECONDS ago; requests in that window are coalesced into one
+    reload at the end of it. flush_wifi_reload() runs a queued reload straight away.
+
+    Returns:
+        bool: True if the reload ran now, False if it is queued
+
+    Raises:
+        Exception: If the immediate reload fails
+    """
+    global _reload_timer, _last_reload_at
+    with _reload_timer_lock:
+        if _reload_timer is not None:
+            return False
+        now = time.monotonic()
+        if _last_reload_at is not None and now - _last_reload_at < WIFI_RELOAD_DELAY_SECONDS:
+            _reload_timer = threading.Timer(_last_reload_at + WIFI_RELOAD_DELAY_SECONDS - now,
+                                            _run_scheduled_wifi_reload)
+            _reload_timer.daemon = True
+            _reload_timer.start()
+            return False
+        _last_reload_at = now
+
+    output, err = _run_with_wifi_reload([WIFI_RELOAD_COMMAND])
+    if err:
+        raise Exception(f"WiFi reload failed: {err}")
+    return True
+
+def flush_wifi_reload():
+    """Run a reload queued by request_wifi_reload() now, e.g. before shutting down."""
+    global _reload_timer
+    with _reload_timer_lock:
+        timer, _reload_timer = _reload_timer, None
+    if timer is not None:
+        timer.cancel()
+        _reload_wifi()
+
+def _run_scheduled_wifi_reload():
+    global _reload_timer, _last_reload_at
+    with _reload_timer_lock:
+        _reload_timer = None
+        _last_reload_at = time.monotonic()
+    _reload_wifi()
+
+def _reload_wifi():
+    output, err = _run_with_wifi_reload([WIFI_RELOAD_COMMAND])
+    if err:
+        logger.error(f"WiFi reload failed: {err}")
+
+def _run_with_wifi_reload(commands):
+    """
+    Runs uci commands ending in WIFI_RELOAD_COMMAND in a single SSH exec.
+    The reload can add or remove wlan interfaces, so the cached interface list is dropped.
+    """
+    result = ssh_manager.execute_commands(commands)
+    invalidate_network_interfaces_cache()
+    return result
+
 def enable_wifi():
     """
     Enables WiFi on the OpenWrt router with default settings.
@@ -27,18 +106,14 @@ def enable_wifi():
             "uci set wireless.@wifi-device[0].disabled='0'",
             "uci set wireless.@wifi-iface[0].disabled='0'",
             "uci commit wireless",
-            "wifi"
+            WIFI_RELOAD_COMMAND
         ]
         
-        for cmd in commands:
-            output, err = ssh_manager.execute_command(cmd)
-            if err:
-                return error(f"Failed to enable WiFi: {err}")
+        output, err = _run_with_wifi_reload(commands)
+        if err:
+            return error(f"Failed to enable WiFi: {err}")
                 
-        # Wait for WiFi to initialize
-        time.sleep(2)
-        
-        # Get the current SSID
+        # Get the current SSID (read from the uci config, so there is no need to wait for the radio)
         ssid_cmd = "uci get wireless.@wifi-iface[0].ssid"
         ssid_output, ssid_error = ssh_manager.execute_command(ssid_cmd)
         
@@ -71,13 +146,12 @@ def change_wifi_password(password, interface_num=0):
             f"uci set wireless.@wifi-iface[{interface_num}].key='{password}'",
             f"uci set wireless.@wifi-iface[{interface_num}].encryption='psk2'",
             "uci commit wireless",
-            "wifi"
+            WIFI_RELOAD_COMMAND
         ]
         
-        for cmd in commands:
-            output, err = ssh_manager.execute_command(cmd)
-            if err:
-                return error(f"Failed to change WiFi password: {err}")
+        output, err = _run_with_wifi_reload(commands)
+        if err:
+            return error(f"Failed to change WiFi password: {err}")
                 
         # Get the current SSID for the response
         ssid_cmd = f"uci get wireless.@wifi-iface[{interface_num}].ssid"
@@ -92,33 +166,61 @@ def change_wifi_password(password, interface_num=0):
         logger.error(f"Error changing WiFi password: {str(e)}", exc_info=True)
         return error(f"Error changing WiFi password: {str(e)}")
 
+def _parse_uci_show(output):
+    """
+    Parses `uci show <config>` output.
+    
+    Args:
+        output: Raw output, one `config.section=type` or `config.section.option='value'` per line
+        
+    Returns:
+        Tuple of (list of (section, type) in config order, dict of (section, option) -> value)
+    """
+    sections = []
+    options = {}
+    for line in output.splitlines():
+        key, sep, value = line.partition("=")
+        if not sep:
+            continue
+        parts = key.split(".")
+        if len(parts) == 2:
+            sections.append((parts[1], value))
+        elif len(parts) == 3:
+            options[(parts[1], parts[2])] = _unquote_uci_value(value)
+    return sections, options
+
+def _unquote_uci_value(value):
+    """Undoes the shell quoting `uci show` applies to an option value."""
+    if len(value) >= 2 and value.startswith("'") and value.endswith("'"):
+        value = value[1:-1]
+    # A single quote inside the value is written as '\'' (close, escaped quote, reopen)
+    return value.replace("'\\''", "'")
+
 def get_wifi_status():
     """
     Gets the current WiFi status including SSID and enabled state.
     Returns a dictionary with status information.
     """
     try:
-        # Check if radio is enabled
-        enabled_cmd = "uci show wireless.@wifi-device[0].disabled"
-        enabled_output, enabled_error = ssh_manager.execute_command(enabled_cmd)
+        # Read the whole wireless config once instead of one SSH call per option
+        output, err = ssh_manager.execute_command("uci show wireless")
         
-        if enabled_error:
+        if err:
             return error("Failed to get WiFi status")
-            
-        # Get SSID
-        ssid_cmd = "uci get wireless.@wifi-iface[0].ssid"
-        ssid_output, ssid_error = ssh_manager.execute_command(ssid_cmd)
         
-        # Get encryption type
-        encryption_cmd = "uci get wireless.@wifi-iface[0].encryption"
-        encryption_output, encryption_error = ssh_manager.execute_command(encryption_cmd)
+        sections, options = _parse_uci_show(output)
+        # First sections of each type, i.e. @wifi-device[0] and @wifi-iface[0]
+        device = next((name for name, kind in sections if kind == "wifi-device"), None)
+        iface = next((name for name, kind in sections if kind == "wifi-iface"), None)
         
-        is_enabled = "disabled='0'" in enabled_output or "disabled=0" in enabled_output
+        disabled = options.get((device, "disabled"))
+        if disabled is None:
+            return error("Failed to get WiFi status")
         
         return success(data={
-            "enabled": is_enabled,
-            "ssid": ssid_output.strip() if not ssid_error else "Unknown",
-            "encryption": encryption_output.strip() if not encryption_error else "Unknown"
+            "enabled": disabled == "0",
+            "ssid": options.get((iface, "ssid"), "Unknown"),
+            "encryption": options.get((iface, "encryption"), "Unknown")
         })
         
     except Exception as e:
@@ -144,13 +246,12 @@ def change_wifi_ssid(ssid, interface_num=0):
         commands = [
             f"uci set wireless.@wifi-iface[{interface_num}].ssid='{ssid}'",
             "uci commit wireless",
-            "wifi"
+            WIFI_RELOAD_COMMAND
         ]
         
-        for cmd in commands:
-            output, err = ssh_manager.execute_command(cmd)
-            if err:
-                return error(f"Failed to change WiFi SSID: {err}")
+        output, err = _run_with_wifi_reload(commands)
+        if err:
+            return error(f"Failed to change WiFi SSID: {err}")
                 
         return success(f"WiFi SSID changed successfully to: {ssid}")
         
@@ -1,7 +1,8 @@
 import sys
 import os
-# Add the parent directory to path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# Add the parent directory to path, only needed when this file is run as a script
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 # Now use regular import
 from utils.ssh_client import ssh_manager
 
@@ -2,6 +2,7 @@ from utils.path_utils import get_data_folder
 from utils.logging_config import get_logger
 import os
 import json
+import threading
 
 logger = get_logger('utils.config')
 
@@ -23,6 +24,10 @@ class ConfigManager:
             'mode': os.path.join(self.data_folder, 'mode.json')
         }
         
+        # Parsed configs by name, filled on first load and refreshed on save
+        self._cache = {}
+        self._cache_lock = threading.Lock()
+        
         # Ensure all config files exist with default values
         self._initialize_config_files()
     
@@ -69,8 +74,12 @@ class ConfigManager:
             raise ValueError(f"Invalid configuration name: {config_name}")
             
         try:
-            with open(self.config_files[config_name], 'r') as f:
-                return json.load(f)
+            with self._cache_lock:
+                if config_name not in self._cache:
+                    with open(self.config_files[config_name], 'r') as f:
+                        self._cache[config_name] = json.load(f)
+                # Callers modify the returned dict before saving it, so hand out a copy
+                return dict(self._cache[config_name])
         except Exception as e:
             logger.error(f"Error loading {config_name} config: {str(e)}", exc_info=True)
             raise
@@ -90,9 +99,16 @@ class ConfigManager:
             raise ValueError(f"Invalid configuration name: {config_name}")
             
         try:
-            with open(self.config_files[config_name], 'w') as f:
-                json.dump(config_data, f, indent=4)
-            logger.info(f"Saved {config_name} configuration")
+            with self._cache_lock:
+                if self._cache.get(config_name) == config_data:
+                    # Nothing changed; skip rewriting the file
+                    logger.debug("%s configuration unchanged, not saving", config_name)
+                    return
+                self._cache.pop(config_name, None)
+                with open(self.config_files[config_name], 'w') as f:
+                    json.dump(config_data, f, indent=4)
+                self._cache[config_name] = dict(config_data)
+            logger.debug("Saved %s configuration", config_name)
         except Exception as e:
             logger.error(f"Error saving {config_name} config: {str(e)}", exc_info=True)
             raise
@@ -0,0 +1,35 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Optional: fall back to Flask's stdlib json provider
+    orjson = None
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that serializes and parses with orjson, so jsonify() and
+    request.get_json() avoid the much slower stdlib json module.
+
+    Output matches the default provider: keys are sorted, responses are compact
+    outside debug mode, and dates go through Flask's own default().
+    """
+
+    def dumps(self, obj, **kwargs):
+        indent = kwargs.pop("indent", None)
+        kwargs.pop("separators", None)  # orjson output is always compact
+        if kwargs or indent not in (None, 2):
+            # Options orjson has no equivalent for
+            return super().dumps(obj, indent=indent, **kwargs)
+
+        option = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+# Provider to install on the app: orjson-backed when it is available
+JSON_PROVIDER = OrjsonProvider if orjson is not None else DefaultJSONProvider
@@ -1,5 +1,6 @@
 import os
 import sys
+from functools import lru_cache
 
 def find_netpilot_root():
     """Finds the 'NetPilot' root directory, whether running as a script or a PyInstaller executable."""
@@ -18,8 +19,9 @@ def find_netpilot_root():
 
     raise FileNotFoundError("NetPilot folder not found in the directory hierarchy.")
 
+@lru_cache(maxsize=None)
 def get_data_folder():
-    """Returns the full path to the 'data' folder inside NetPilot."""
+    """Returns the full path to the 'data' folder inside NetPilot. Resolved once per process."""
     netpilot_root = find_netpilot_root()
     data_folder = os.path.join(netpilot_root, "data")
     os.makedirs(data_folder, exist_ok=True)  # Ensure the 'data' folder exists
@@ -1,8 +1,14 @@
 import paramiko
 import os
+import socket
+import threading
 from utils.path_utils import get_data_folder
 from dotenv import load_dotenv
 
+# Seconds between keepalive packets on the idle session, so the router or a NAT
+# in between doesn't drop the persistent connection
+KEEPALIVE_INTERVAL_SECONDS = 30
+
 class SSHClientManager:
     """
     Manages a persistent SSH connection to the router.
@@ -17,6 +23,9 @@ class SSHClientManager:
         self.username = os.getenv("ROUTER_USERNAME")
         self.password = os.getenv("ROUTER_PASSWORD")
         self.ssh = None  # SSH session
+        # Commands may run from several threads (each gets its own channel on the
+        # shared transport); only (re)connecting has to be serialized
+        self._connect_lock = threading.Lock()
 
         # Debug: print loaded values (mask password for safety)
         print(f"ROUTER_IP: {self.router_ip}")
@@ -36,32 +45,80 @@ class SSHClientManager:
     def connect(self):
         """
         Establish an SSH connection if not already connected.
+
+        Returns:
+            paramiko.SSHClient: The connected client
+        """
+        with self._connect_lock:
+            return self._connect_locked()
+
+    def _connect_locked(self):
+        transport = self.ssh.get_transport() if self.ssh else None
+        if transport is None or not transport.is_active():
+            client = paramiko.SSHClient()
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            client.connect(self.router_ip, username=self.username, password=self.password)
+            client.get_transport().set_keepalive(KEEPALIVE_INTERVAL_SECONDS)
+            self.ssh = client
+        return self.ssh
+
+    def _reconnect(self, failed_client):
+        """
+        Replaces a client whose session has died and returns the new one.
+        If another thread already replaced it, that connection is reused as is.
         """
-        if self.ssh is None or not self.ssh.get_transport().is_active():
-            self.ssh = paramiko.SSHClient()
-            self.ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            self.ssh.connect(self.router_ip, username=self.username, password=self.password)
+        with self._connect_lock:
+            if self.ssh is failed_client:
+                failed_client.close()
+                self.ssh = None
+            return self._connect_locked()
+
+    @staticmethod
+    def _open_channel(client):
+        transport = client.get_transport()
+        if transport is None:
+            raise paramiko.SSHException("SSH connection is closed")
+        return transport.open_session()
 
     def execute_command(self, command):
         """
         Executes a command on the router via SSH.
         """
         try:
-            self.connect()  # Ensure connection is active
-            stdin, stdout, stderr = self.ssh.exec_command(command)
-            output = stdout.read().decode().strip()
-            error = stderr.read().decode().strip()
+            client = self.connect()  # Ensure connection is active
+            try:
+                channel = self._open_channel(client)
+            except (paramiko.SSHException, socket.error):
+                # The session died without the transport noticing (e.g. the router
+                # restarted). The command hasn't been sent yet, so reconnect once and retry.
+                channel = self._open_channel(self._reconnect(client))
+
+            # From here on the command may have run, so failures are not retried
+            try:
+                channel.exec_command(command)
+                output = channel.makefile('rb').read().decode().strip()
+                error = channel.makefile_stderr('rb').read().decode().strip()
+            finally:
+                channel.close()
             return output, error if error else None
         except Exception as e:
             return None, str(e)
 
+    def execute_commands(self, commands):
+        """
+        Executes several commands on the router in a single SSH exec.
+        Commands are chained with '&&', so execution stops at the first failure.
+        """
+        return self.execute_command(" && ".join(commands))
+
     def close_connection(self):
         """
         Closes the SSH connection.
         """
-        if self.ssh:
-            self.ssh.close()
-            self.ssh = None
+        with self._connect_lock:
+            if self.ssh:
+                self.ssh.close()
+                self.ssh = None
 
 # Initialize a single global instance of the SSH client
 ssh_manager = SSHClientManager()
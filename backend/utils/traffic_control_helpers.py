@@ -1,16 +1,34 @@
+import time
 from utils.ssh_client import ssh_manager
 from utils.logging_config import get_logger
 
 logger = get_logger('utils.traffic_control_helpers')
 
+# Router interfaces rarely change, so they are listed over SSH once and reused.
+# Cleared after WiFi reloads and when applying rules fails, in case the interface
+# set has changed; netifd brings wlan interfaces up asynchronously after a reload,
+# so the list also expires after INTERFACES_CACHE_SECONDS.
+INTERFACES_CACHE_SECONDS = 60
+_interfaces_cache = None
+_interfaces_cached_at = 0.0
+
 def get_all_network_interfaces_helper():
     """Gets all network interfaces from the router, excluding 'lo'."""
-    cmd = "ls /sys/class/net/"
-    output, error = ssh_manager.execute_command(cmd)
-    if error:
-        logger.error(f"Error getting network interfaces: {error}")
-        raise Exception(f"Failed to get network interfaces: {error}")
-    return [iface for iface in output.split() if iface not in ['lo']]
+    global _interfaces_cache, _interfaces_cached_at
+    if _interfaces_cache is None or time.monotonic() - _interfaces_cached_at > INTERFACES_CACHE_SECONDS:
+        cmd = "ls /sys/class/net/"
+        output, error = ssh_manager.execute_command(cmd)
+        if error:
+            logger.error(f"Error getting network interfaces: {error}")
+            raise Exception(f"Failed to get network interfaces: {error}")
+        _interfaces_cache = [iface for iface in output.split() if iface not in ['lo']]
+        _interfaces_cached_at = time.monotonic()
+    return list(_interfaces_cache)
+
+def invalidate_network_interfaces_cache():
+    """Forces the next get_all_network_interfaces_helper call to query the router again."""
+    global _interfaces_cache
+    _interfaces_cache = None
 
 def _run_ssh_command(cmd: str):
     """Runs a command via SSH and raises an exception if an error occurs."""
@@ -19,9 +37,23 @@ def _run_ssh_command(cmd: str):
         logger.error(f"Command failed: {cmd}, Error: {error}")
         raise Exception(f"Command failed: {cmd}, Error: {error}")
     if output:
-        logger.debug(f"Command output for '{cmd}': {output}")
+        logger.debug("Command output for '%s': %s", cmd, output)
     return True
 
+def _run_ssh_commands(cmds: list):
+    """Runs several commands in a single SSH exec, stopping at the first failure."""
+    if not cmds:
+        return True
+    return _run_ssh_command(" && ".join(cmds))
+
+def _ip_mark_commands(ips: list, mark: int) -> list:
+    """Builds the iptables mangle commands that set `mark` on traffic from and to each IP."""
+    cmds = []
+    for ip in ips:
+        cmds.append(f"iptables -t mangle -A PREROUTING -s {ip} -j MARK --set-mark {mark}")
+        cmds.append(f"iptables -t mangle -A POSTROUTING -d {ip} -j MARK --set-mark {mark}")
+    return cmds
+
 def _setup_tc_on_single_interface(interface: str, limit_rate: str, full_rate: str):
     """Sets up TC rules on a single network interface."""
     logger.info(f"Setting up TC on {interface}: Limit Rate={limit_rate}, Full Rate={full_rate}")
@@ -57,17 +89,13 @@ def setup_traffic_rules(mode: str, ips_to_target: list, limit_rate: str, full_ra
             # Traffic remaining marked '99' will be filtered by tc to class 1:10 (limit_rate).
             _run_ssh_command("iptables -t mangle -A PREROUTING -j MARK --set-mark 99")
             _run_ssh_command("iptables -t mangle -A POSTROUTING -j MARK --set-mark 99")
-            for ip in ips_to_target:
-                _run_ssh_command(f"iptables -t mangle -A PREROUTING -s {ip} -j MARK --set-mark 0")
-                _run_ssh_command(f"iptables -t mangle -A POSTROUTING -d {ip} -j MARK --set-mark 0")
+            _run_ssh_commands(_ip_mark_commands(ips_to_target, 0))
         elif mode == 'blacklist':
             # For blacklist mode:
             # 1. Only mark traffic related to ips_to_target (blacklisted IPs) with '99'.
             # Traffic marked '99' will be filtered by tc to class 1:10 (limit_rate).
             # Unmarked traffic (non-blacklisted) will use the default htb class (1:1, full_rate).
-            for ip in ips_to_target:
-                _run_ssh_command(f"iptables -t mangle -A PREROUTING -s {ip} -j MARK --set-mark 99")
-                _run_ssh_command(f"iptables -t mangle -A POSTROUTING -d {ip} -j MARK --set-mark 99")
+            _run_ssh_commands(_ip_mark_commands(ips_to_target, 99))
         else:
             raise ValueError(f"Invalid mode for setup_traffic_rules: {mode}. Must be 'whitelist' or 'blacklist'.")
 
@@ -91,4 +119,5 @@ def setup_traffic_rules(mode: str, ips_to_target: list, limit_rate: str, full_ra
 
     except Exception as e:
         logger.error(f"Error in setup_traffic_rules for mode {mode}: {str(e)}", exc_info=True)
+        invalidate_network_interfaces_cache()
         raise # Re-raise for the service layer to catch and return a proper HTTP response 
\ No newline at end of file